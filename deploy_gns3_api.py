@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Déploiement des configs générées via l'API REST du serveur GNS3 (v2).
+
+Alternative à deploy_to_gns3.py : on n'écrit plus dans project-files sur le
+disque local, on passe par le serveur GNS3 (local ou distant). Utile quand le
+serveur tourne sur une autre machine / une VM GNS3.
+
+Endpoints utilisés :
+  GET  /v2/projects
+  POST /v2/projects/<project_id>/open
+  GET  /v2/projects/<project_id>/nodes
+  GET  /v2/projects/<project_id>/nodes/<node_id>/files/<path>
+  POST /v2/projects/<project_id>/nodes/<node_id>/files/<path>
+  POST /v2/projects/<project_id>/nodes/<node_id>/{stop,start}
+
+gns3_stub_server.py implémente ces endpoints pour tester sans GNS3.
+"""
+import argparse
+import base64
+import http.client
+import json
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+import deploy_to_gns3
+
+
+class GNS3ApiError(RuntimeError):
+    """Réponse HTTP inattendue du serveur GNS3."""
+
+    def __init__(self, method: str, path: str, status: int, body: str):
+        super().__init__(f"{method} {path} -> HTTP {status}: {body.strip()[:200]}")
+        self.status = status
+
+
+class GNS3Client:
+    """
+    Petit client HTTP pour l'API GNS3.
+
+    Les connexions sont gardées ouvertes (keep-alive) dans un pool : chaque
+    requête emprunte une connexion et la rend ensuite, donc plusieurs threads
+    peuvent appeler le client en parallèle sans rouvrir une socket à chaque fois.
+    """
+
+    def __init__(self, server: str, user: Optional[str] = None, password: Optional[str] = None,
+                 pool_size: int = 8, timeout: float = 30.0):
+        url = urlsplit(server if "://" in server else f"http://{server}")
+        if url.scheme not in ("http", "https"):
+            raise ValueError(f"Schéma non supporté pour le serveur GNS3: {url.scheme}")
+        self.scheme = url.scheme
+        self.host = url.hostname or "localhost"
+        self.port = url.port or (443 if url.scheme == "https" else 3080)
+        self.base = url.path.rstrip("/")
+        self.timeout = timeout
+
+        self.headers = {"Connection": "keep-alive"}
+        if user:
+            token = base64.b64encode(f"{user}:{password or ''}".encode("utf-8")).decode("ascii")
+            self.headers["Authorization"] = f"Basic {token}"
+
+        self._pool: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, pool_size))
+
+    def _new_connection(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        self._slots.acquire()
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._new_connection()
+
+    def _release(self, conn: Optional[http.client.HTTPConnection]) -> None:
+        if conn is not None:
+            self._pool.put(conn)
+        self._slots.release()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None,
+                content_type: str = "application/json") -> Tuple[int, bytes]:
+        """Envoie une requête et renvoie (status, corps brut). Lève GNS3ApiError si status >= 400."""
+        full_path = f"{self.base}{path}"
+        headers = dict(self.headers)
+        if body is not None:
+            headers["Content-Type"] = content_type
+
+        conn = self._acquire()
+        try:
+            # Une connexion keep-alive peut avoir été fermée par le serveur entre
+            # deux requêtes : on retente une fois avec une socket neuve.
+            for attempt in (0, 1):
+                try:
+                    conn.request(method, full_path, body=body, headers=headers)
+                    resp = conn.getresponse()
+                    data = resp.read()
+                    break
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError,
+                        http.client.CannotSendRequest, http.client.ResponseNotReady):
+                    conn.close()
+                    conn = self._new_connection()
+                    if attempt == 1:
+                        raise
+            if resp.will_close:
+                conn.close()
+                conn = self._new_connection()
+        except Exception:
+            conn.close()
+            self._release(None)
+            raise
+        self._release(conn)
+
+        if resp.status >= 400:
+            raise GNS3ApiError(method, path, resp.status, data.decode("utf-8", "replace"))
+        return resp.status, data
+
+    def get_json(self, path: str):
+        _, data = self.request("GET", path)
+        return json.loads(data.decode("utf-8")) if data else None
+
+    def post_json(self, path: str, payload: Optional[dict] = None):
+        body = json.dumps(payload or {}).encode("utf-8")
+        _, data = self.request("POST", path, body=body)
+        return json.loads(data.decode("utf-8")) if data else None
+
+    # -----------------------------------------------------
+    # Projets / nodes
+    # -----------------------------------------------------
+
+    def find_project(self, name_or_id: str) -> dict:
+        projects = self.get_json("/v2/projects") or []
+        for p in projects:
+            if name_or_id in (p.get("project_id"), p.get("name")):
+                return p
+        known = ", ".join(sorted(p.get("name", "?") for p in projects)) or "(aucun)"
+        raise LookupError(f"Projet GNS3 introuvable: {name_or_id} (projets connus: {known})")
+
+    def open_project(self, project_id: str) -> None:
+        self.post_json(f"/v2/projects/{project_id}/open")
+
+    def list_nodes(self, project_id: str) -> List[dict]:
+        return self.get_json(f"/v2/projects/{project_id}/nodes") or []
+
+    def read_node_file(self, project_id: str, node_id: str, path: str) -> Optional[str]:
+        try:
+            _, data = self.request("GET", f"/v2/projects/{project_id}/nodes/{node_id}/files/{quote(path)}")
+        except GNS3ApiError as e:
+            if e.status == 404:
+                return None
+            raise
+        return data.decode("utf-8", "replace")
+
+    def write_node_file(self, project_id: str, node_id: str, path: str, content: str) -> None:
+        self.request("POST", f"/v2/projects/{project_id}/nodes/{node_id}/files/{quote(path)}",
+                     body=content.encode("utf-8"), content_type="application/octet-stream")
+
+    def node_action(self, project_id: str, node_id: str, action: str) -> None:
+        self.post_json(f"/v2/projects/{project_id}/nodes/{node_id}/{action}")
+
+
+def startup_config_path(node: dict) -> Optional[str]:
+    """
+    Chemin du startup-config d'un node, relatif à son dossier côté serveur
+    (même fichier que celui trouvé par deploy_to_gns3.find_startup_config).
+    """
+    props = node.get("properties") or {}
+    node_type = node.get("node_type")
+    if node_type == "dynamips":
+        dynamips_id = props.get("dynamips_id")
+        if dynamips_id is None:
+            return None
+        return f"configs/i{dynamips_id}_startup-config.cfg"
+    if node_type == "iou":
+        return "startup-config.cfg"
+    return None
+
+
+def load_generated(gen_dir: str, names: List[str], ext: str) -> Dict[str, str]:
+    """Lit <name><ext> pour chaque node qui a une config générée."""
+    configs = {}
+    for name in names:
+        path = os.path.join(gen_dir, f"{name}{ext}")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                configs[name] = f.read()
+    return configs
+
+
+def deploy_node(client: GNS3Client, project_id: str, node: dict, cfg_path: str, content: str,
+                do_backup: bool, dry_run: bool, force: bool, action: str = "none") -> str:
+    """
+    Upload le startup-config si besoin, puis applique l'action.
+    Renvoie "changed", "unchanged" ou "running" (node démarré laissé tel quel).
+
+    Un routeur dynamips qu'on arrête réécrit configs/i<N>_startup-config.cfg depuis
+    sa NVRAM : un upload sur un node démarré serait écrasé au prochain stop. Pour
+    un node démarré on fait donc stop -> upload -> start, et avec --action none
+    on ne le touche pas.
+    """
+    node_id = node["node_id"]
+    # Même avec force, il faut le contenu actuel pour pouvoir en faire un backup
+    current = client.read_node_file(project_id, node_id, cfg_path) if (do_backup or not force) else None
+    if not force and current == content:
+        return "unchanged"
+
+    running = node.get("status") == "started"
+    if running and action == "none":
+        print(f"⚠️ {node['name']} est démarré : upload ignoré (le stop l'écraserait), utilise --action reload")
+        return "running"
+
+    if dry_run:
+        if running:
+            print(f"[DRY] STOP {node['name']}")
+        print(f"[DRY] UPLOAD {node['name']}  ->  {cfg_path}")
+        return "changed"
+
+    if running:
+        client.node_action(project_id, node_id, "stop")
+    try:
+        if running and do_backup:
+            # stop() a pu réécrire le fichier avec la config qui tournait
+            current = client.read_node_file(project_id, node_id, cfg_path)
+
+        if do_backup and current is not None:
+            bak = deploy_to_gns3.backup_name(cfg_path)
+            client.write_node_file(project_id, node_id, bak, current)
+            print(f"🧷 Backup: {node['name']} -> {bak}")
+
+        client.write_node_file(project_id, node_id, cfg_path, content)
+        print(f"✅ Deployed: {node['name']} -> {cfg_path}")
+    finally:
+        # "reload" ne démarre pas un node qui était arrêté ; "start"/"restart" si.
+        # Un node arrêté par nous est redémarré même si l'upload a échoué.
+        if action in ("start", "restart") or running:
+            client.node_action(project_id, node_id, "start")
+            print(f"🔄 {action}: {node['name']}")
+    return "changed"
+
+
+def deploy_configs(client: GNS3Client, project_id: str, nodes: List[dict], configs: Dict[str, str],
+                   do_backup: bool = False, dry_run: bool = False, force: bool = False,
+                   action: str = "none", jobs: int = 8) -> dict:
+    """
+    Déploie configs ({nom_routeur: texte}) sur les nodes du projet, en parallèle.
+    Seuls les nodes dont le startup-config change sont rechargés. Le "status"
+    des nodes (started/stopped) doit être frais : il décide du stop/start.
+    Une erreur sur un node ne bloque pas les autres : il est mis dans "failed".
+    """
+    missing_generated: List[str] = []
+    missing_startup: List[str] = []
+    targets: List[Tuple[dict, str, str]] = []
+
+    for n in nodes:
+        name = n.get("name")
+        if not name or not n.get("node_id"):
+            continue
+        if name not in configs:
+            missing_generated.append(name)
+            continue
+        cfg_path = startup_config_path(n)
+        if cfg_path is None:
+            missing_startup.append(name)
+            continue
+        targets.append((n, cfg_path, configs[name]))
+
+    def deploy_target(t: Tuple[dict, str, str]) -> str:
+        try:
+            return deploy_node(client, project_id, t[0], t[1], t[2], do_backup, dry_run, force, action)
+        except (GNS3ApiError, OSError, http.client.HTTPException) as e:
+            print(f"❌ {t[0]['name']}: {e}")
+            return "failed"
+
+    report = {"changed": [], "unchanged": [], "running": [], "failed": []}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as ex:
+        for (n, _, _), status in zip(targets, ex.map(deploy_target, targets)):
+            report[status].append(n["name"])
+
+    report["missing_generated"] = missing_generated
+    report["missing_startup"] = missing_startup
+    return report
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Déploie les configs générées (output/*.cfg) via l'API REST du serveur GNS3."
+    )
+    ap.add_argument("--server", default="http://localhost:3080", help="URL du serveur GNS3 (par défaut: http://localhost:3080)")
+    ap.add_argument("--project", required=True, help="Nom ou project_id du projet GNS3")
+    ap.add_argument("--generated", default="output", help="Dossier contenant R1.cfg, R2.cfg, ... (par défaut: output)")
+    ap.add_argument("--ext", default=".cfg", help="Extension des configs générées (par défaut: .cfg)")
+    ap.add_argument("--user", default=None, help="Utilisateur HTTP basic auth (si activé sur le serveur)")
+    ap.add_argument("--password", default=None, help="Mot de passe HTTP basic auth")
+    ap.add_argument("--backup", action="store_true", help="Garde une copie .bak-<date> du startup-config distant avant d'écraser")
+    ap.add_argument("--dry-run", action="store_true", help="N'écrit rien, affiche juste ce qui serait envoyé")
+    ap.add_argument("--force", action="store_true", help="Envoie toutes les configs, même si elles n'ont pas changé")
+    ap.add_argument("--action", choices=["none", "reload", "restart", "start"], default="none",
+                    help="Action sur les nodes modifiés après upload (par défaut: none)")
+    ap.add_argument("--jobs", type=int, default=8, help="Nombre de requêtes HTTP en parallèle (par défaut: 8)")
+    args = ap.parse_args()
+
+    client = GNS3Client(args.server, args.user, args.password, pool_size=args.jobs)
+    try:
+        project = client.find_project(args.project)
+        project_id = project["project_id"]
+        print(f"📄 Using project: {project.get('name')} ({project_id}) on {args.server}")
+        if project.get("status") != "opened":
+            client.open_project(project_id)
+
+        nodes = client.list_nodes(project_id)
+        if not nodes:
+            raise RuntimeError("Aucun node trouvé dans le projet (GET /nodes vide).")
+
+        configs = load_generated(os.path.abspath(args.generated), [n.get("name") for n in nodes if n.get("name")], args.ext)
+        report = deploy_configs(client, project_id, nodes, configs, do_backup=args.backup,
+                                dry_run=args.dry_run, force=args.force, action=args.action, jobs=args.jobs)
+    finally:
+        client.close()
+
+    print("\n=== SUMMARY ===")
+    print(f"Deployed: {len(report['changed'])}")
+    print(f"Unchanged: {len(report['unchanged'])}")
+    if report["missing_generated"]:
+        print(f"⚠️ No generated cfg for: {', '.join(sorted(set(report['missing_generated'])))}")
+    if report["missing_startup"]:
+        print(f"⚠️ No startup-config path for: {', '.join(sorted(set(report['missing_startup'])))}")
+    if report["running"]:
+        print(f"⚠️ Nodes démarrés non mis à jour : {', '.join(sorted(report['running']))} "
+              "(relance avec --action reload)")
+    if report["failed"]:
+        print(f"❌ Failed: {', '.join(sorted(report['failed']))}")
+
+    print("\n✅ Done." if not report["failed"] else "\n❌ Done with errors.")
+
+
+if __name__ == "__main__":
+    main()
@@ -75,9 +75,14 @@ def find_startup_config(node_dir: str) -> Optional[str]:
     return hits[0]
 
 
+def backup_name(path: str) -> str:
+    # Microsecondes : deux déploiements dans la même seconde (mode watch) ne s'écrasent pas
+    ts = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    return f"{path}.bak-{ts}"
+
+
 def backup_file(path: str) -> str:
-    ts = datetime.now().strftime("%Y%m%d-%H%M%S")
-    bak = f"{path}.bak-{ts}"
+    bak = backup_name(path)
     shutil.copy2(path, bak)
     return bak
 
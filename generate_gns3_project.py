@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Génère un projet GNS3 complet (.gns3 + project-files) à partir de l'intent.
+
+Plus besoin de placer les routeurs et de câbler les liens à la main : on écrit
+en une passe
+  - topology.nodes : un routeur c7200 par routeur de l'intent, avec un node_id
+    stable (uuid5 du nom du réseau + nom du routeur) et des slots déduits des
+    interfaces utilisées ;
+  - topology.links : adapter/port déduits du nom d'interface
+    (GigabitEthernet2/0 -> adapter 2, port 0) ;
+  - des coordonnées calculées automatiquement (une grille par AS) ;
+  - project-files/dynamips/<node_id>/configs/i<dynamips_id>_startup-config.cfg
+    avec les configs générées, là où deploy_to_gns3.py les cherche.
+Avec --force, on ne remplace qu'un projet généré par ce script (node_id en
+uuid5) : ses dynamips_id sont conservés et, une fois le nouveau projet écrit,
+ses anciens .gns3 / startup-configs qui ne sont plus référencés sont supprimés.
+Un projet fait dans GNS3 n'est jamais écrasé.
+"""
+import argparse
+import json
+import math
+import os
+import re
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import deploy_to_gns3
+import generateurchat as generateur
+import intent_model
+from main import load_intent
+
+GNS3_VERSION = "2.2.55"
+DEFAULT_IMAGE = "c7200-advipservicesk9-mz.152-4.S5.image"
+LABEL_STYLE = "font-family: TypeWriter;font-size: 10.0;font-weight: bold;fill: #000000;fill-opacity: 1.0;"
+
+NODE_SPACING = 150      # écart entre deux routeurs d'un même AS
+AS_SPACING = 250        # écart supplémentaire entre deux AS
+MAX_SLOT = 6            # c7200 : slot0 (I/O) + 6 port adapters
+
+# Port adapters c7200 selon le type d'interface et le slot (0 = carte I/O) :
+# liste de (adapter, nombre de ports), du plus petit au plus grand
+SLOT_ADAPTERS = {
+    "GigabitEthernet": {0: [("C7200-IO-GE-E", 1)], 1: [("PA-GE", 1)]},
+    "FastEthernet": {0: [("C7200-IO-FE", 1), ("C7200-IO-2FE", 2)], 1: [("PA-FE-TX", 1), ("PA-2FE-TX", 2)]},
+}
+LABEL_PREFIX = {"GigabitEthernet": "g", "FastEthernet": "f"}
+
+_IFACE_RE = re.compile(r"^([A-Za-z]+)(\d+)/(\d+)$")
+_STARTUP_RE = re.compile(r"^i\d+_startup-config\.cfg$")
+
+
+def parse_interface(name: str) -> Tuple[str, int, int]:
+    """'GigabitEthernet2/0' -> ('GigabitEthernet', 2, 0)"""
+    m = _IFACE_RE.match(name)
+    if m is None or m.group(1) not in SLOT_ADAPTERS:
+        raise ValueError(
+            f"Interface non supportée: {name} (attendu FastEthernetX/Y ou GigabitEthernetX/Y)"
+        )
+    return m.group(1), int(m.group(2)), int(m.group(3))
+
+
+def stable_id(*parts: str) -> str:
+    """UUID déterministe : regénérer le projet garde les mêmes ids."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, "gns://" + "/".join(parts)))
+
+
+def router_slots(model: intent_model.IntentModel, router: intent_model.Router) -> Dict[str, str]:
+    """slot0..slot6 du c7200 d'après les interfaces utilisées par le routeur."""
+    kinds: Dict[int, str] = {}
+    ports: Dict[int, int] = {}
+    for iface in model.router_interfaces(router):
+        kind, slot, port = parse_interface(iface.name)
+        if slot > MAX_SLOT:
+            raise ValueError(f"{router.name}: {iface.name} demande le slot {slot} (c7200: slots 0 à {MAX_SLOT}).")
+        if kinds.setdefault(slot, kind) != kind:
+            raise ValueError(f"{router.name}: slot {slot} utilisé à la fois en {kinds[slot]} et en {kind}.")
+        ports[slot] = max(ports.get(slot, 0), port + 1)
+
+    slots: Dict[str, str] = {}
+    for slot in range(0, MAX_SLOT + 1):
+        if slot not in kinds and slot != 0:
+            slots[f"slot{slot}"] = None
+            continue
+        kind = kinds.get(slot, "FastEthernet")
+        choices = SLOT_ADAPTERS[kind][min(slot, 1)]
+        fitting = [name for name, n in choices if n >= ports.get(slot, 0)]
+        if not fitting:
+            raise ValueError(
+                f"{router.name}: {kind}{slot}/{ports[slot] - 1} n'existe sur aucun adapter c7200 "
+                f"(max {choices[-1][1]} port(s) en slot {slot})."
+            )
+        slots[f"slot{slot}"] = fitting[0]
+    return slots
+
+
+def layout(model: intent_model.IntentModel) -> Dict[str, Tuple[int, int]]:
+    """
+    Une grille carrée par AS, les AS étant eux-mêmes rangés en grille.
+    Le tout est centré sur (0, 0) comme dans la scène GNS3.
+    """
+    blocks = []
+    for as_obj in model.autonomous_systems:
+        cols = max(1, math.ceil(math.sqrt(len(as_obj.routers))))
+        rows = max(1, math.ceil(len(as_obj.routers) / cols))
+        blocks.append((as_obj, cols, rows))
+
+    block_w = max((c for _, c, _ in blocks), default=1) * NODE_SPACING + AS_SPACING
+    block_h = max((r for _, _, r in blocks), default=1) * NODE_SPACING + AS_SPACING
+    per_line = max(1, math.ceil(math.sqrt(len(blocks))))
+    lines = max(1, math.ceil(len(blocks) / per_line))
+    x0 = -(per_line * block_w) // 2
+    y0 = -(lines * block_h) // 2
+
+    pos = {}
+    for b, (as_obj, cols, _) in enumerate(blocks):
+        bx = x0 + (b % per_line) * block_w
+        by = y0 + (b // per_line) * block_h
+        for i, router in enumerate(as_obj.routers):
+            pos[router.name] = (bx + (i % cols) * NODE_SPACING, by + (i // cols) * NODE_SPACING)
+    return pos
+
+
+def make_node(router: intent_model.Router, node_id: str, dynamips_id: int, console: int,
+              x: int, y: int, slots: Dict[str, str], image: str) -> dict:
+    properties = {
+        "auto_delete_disks": True,
+        "aux": None,
+        "clock_divisor": 4,
+        "disk0": 0,
+        "disk1": 0,
+        "dynamips_id": dynamips_id,
+        "exec_area": 64,
+        "idlemax": 500,
+        "idlepc": "",
+        "idlesleep": 30,
+        "image": image,
+        "midplane": "vxr",
+        "mmap": True,
+        "npe": "npe-400",
+        "nvram": 512,
+        "platform": "c7200",
+        "power_supplies": [1, 1],
+        "ram": 512,
+        "sensors": [22, 22, 22, 22],
+        "sparsemem": True,
+        "system_id": "FTX0945W0MY",
+        "usage": "",
+    }
+    properties.update(slots)
+    return {
+        "compute_id": "local",
+        "console": console,
+        "console_auto_start": False,
+        "console_type": "telnet",
+        "custom_adapters": [],
+        "first_port_name": None,
+        "height": 45,
+        "label": {"rotation": 0, "style": LABEL_STYLE, "text": router.name, "x": 22, "y": -25},
+        "locked": False,
+        "name": router.name,
+        "node_id": node_id,
+        "node_type": "dynamips",
+        "port_name_format": "Ethernet{0}",
+        "port_segment_size": 0,
+        "properties": properties,
+        "symbol": ":/symbols/router.svg",
+        "width": 66,
+        "x": x,
+        "y": y,
+        "z": 1,
+    }
+
+
+def make_link(link_id: str, ends: List[Tuple[str, str]]) -> dict:
+    nodes = []
+    for node_id, iface_name in ends:
+        kind, adapter, port = parse_interface(iface_name)
+        nodes.append({
+            "adapter_number": adapter,
+            "label": {
+                "rotation": 0,
+                "style": LABEL_STYLE,
+                "text": f"{LABEL_PREFIX[kind]}{adapter}/{port}",
+                "x": 0,
+                "y": 0,
+            },
+            "node_id": node_id,
+            "port_number": port,
+        })
+    return {"filters": {}, "link_id": link_id, "link_style": {}, "nodes": nodes, "suspend": False}
+
+
+def is_generated(gns3_path: str) -> bool:
+    """
+    Un .gns3 écrit par ce script : project_id et node_id sont des uuid5
+    (stable_id), alors que GNS3 crée des uuid4.
+    """
+    try:
+        with open(gns3_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        ids = [data.get("project_id")] + [n.get("node_id") for n in data.get("topology", {}).get("nodes", [])]
+        return all(uuid.UUID(str(i)).version == 5 for i in ids)
+    except (OSError, ValueError, AttributeError):
+        return False
+
+
+def find_projects(project_dir: str) -> Tuple[List[str], List[str]]:
+    """(.gns3 générés par ce script, autres .gns3) présents dans project_dir."""
+    generated, others = [], []
+    if os.path.isdir(project_dir):
+        for fn in sorted(os.listdir(project_dir)):
+            if fn.lower().endswith(".gns3"):
+                path = os.path.join(project_dir, fn)
+                (generated if is_generated(path) else others).append(path)
+    return generated, others
+
+
+def existing_dynamips_ids(gns3_paths: List[str]) -> Dict[str, int]:
+    """{node_id: dynamips_id} des nodes de ces projets .gns3."""
+    ids: Dict[str, int] = {}
+    for path in gns3_paths:
+        for n in deploy_to_gns3.load_project_nodes(path):
+            dynamips_id = (n.get("properties") or {}).get("dynamips_id")
+            if n.get("node_id") and isinstance(dynamips_id, int):
+                ids.setdefault(n["node_id"], dynamips_id)
+    return ids
+
+
+def assign_dynamips_ids(node_ids: List[str], known: Dict[str, int]) -> Dict[str, int]:
+    """
+    Garde le dynamips_id déjà connu de chaque node (donc le nom i<N>_startup-config.cfg),
+    et donne aux nouveaux nodes les plus petits ids libres : insérer un routeur dans
+    l'intent ne renumérote pas les autres.
+    """
+    assigned: Dict[str, int] = {}
+    used = set()
+    for node_id in node_ids:
+        dynamips_id = known.get(node_id)
+        if dynamips_id is not None and dynamips_id not in used:
+            assigned[node_id] = dynamips_id
+            used.add(dynamips_id)
+    next_id = 1
+    for node_id in node_ids:
+        if node_id in assigned:
+            continue
+        while next_id in used:
+            next_id += 1
+        assigned[node_id] = next_id
+        used.add(next_id)
+    return assigned
+
+
+def build_project(intent: dict, project_name: str, image: str, console_base: int = 5000,
+                  known_ids: Optional[Dict[str, int]] = None):
+    """
+    Renvoie (contenu du .gns3, {node_id: (chemin relatif du startup-config, config)}).
+    known_ids : {node_id: dynamips_id} d'un projet précédent, à réutiliser.
+    """
+    model = intent_model.build_model(intent)
+    policies = generateur.configurer_bgp_policies(intent) if intent.get("bgp") else None
+    network = model.network_name or project_name
+
+    positions = layout(model)
+    routers = [r for as_obj in model.autonomous_systems for r in as_obj.routers]
+    node_ids: Dict[str, str] = {r.name: stable_id(network, "node", r.name) for r in routers}
+    dynamips_ids = assign_dynamips_ids([node_ids[r.name] for r in routers], known_ids or {})
+    nodes = []
+    configs: Dict[str, Tuple[str, str]] = {}
+    for router in routers:
+        node_id = node_ids[router.name]
+        dynamips_id = dynamips_ids[node_id]
+        x, y = positions[router.name]
+        nodes.append(make_node(router, node_id, dynamips_id, console_base + dynamips_id - 1, x, y,
+                               router_slots(model, router), image))
+        cfg_path = os.path.join("configs", f"i{dynamips_id}_startup-config.cfg")
+        configs[node_id] = (cfg_path, generateur.assembler_configuration_model(model, router.name, policies))
+
+    links = []
+    used_ports = set()
+    for li in range(model.link_count):
+        ends = model.link(li).endpoints
+        if len(ends) != 2:
+            print(f"⚠️ Lien #{li} ignoré : {len(ends)} extrémités (un lien GNS3 relie exactement 2 ports)")
+            continue
+        ends_by_node = []
+        for device, iface in ends:
+            if device not in node_ids:
+                raise ValueError(f"Lien #{li}: {device} n'est déclaré dans aucun AS.")
+            key = (device, iface.name)
+            if key in used_ports:
+                raise ValueError(f"{device} {iface.name} est utilisé par plusieurs liens.")
+            used_ports.add(key)
+            ends_by_node.append((node_ids[device], iface.name))
+        link_id = stable_id(network, "link", *sorted(f"{d}:{i.name}" for d, i in ends))
+        links.append(make_link(link_id, ends_by_node))
+
+    xs = [n["x"] for n in nodes] or [0]
+    ys = [n["y"] for n in nodes] or [0]
+    project = {
+        "auto_close": True,
+        "auto_open": False,
+        "auto_start": False,
+        "drawing_grid_size": 25,
+        "grid_size": 75,
+        "name": project_name,
+        "project_id": stable_id(network, "project", project_name),
+        "revision": 9,
+        "scene_height": max(1000, 2 * max(map(abs, ys)) + 2 * NODE_SPACING),
+        "scene_width": max(2000, 2 * max(map(abs, xs)) + 2 * NODE_SPACING),
+        "show_grid": False,
+        "show_interface_labels": True,
+        "show_layers": False,
+        "snap_to_grid": False,
+        "supplier": None,
+        "topology": {"computes": [], "drawings": [], "links": links, "nodes": nodes},
+        "type": "topology",
+        "variables": None,
+        "version": GNS3_VERSION,
+        "zoom": 100,
+    }
+    return project, configs
+
+
+def prune_project(project_dir: str, gns3_path: str, old_projects: List[str], old_node_ids: List[str],
+                  configs: Dict[str, Tuple[str, str]]) -> List[str]:
+    """
+    Supprime ce que le nouveau projet ne référence plus, uniquement parmi ce que
+    ce script avait généré : les anciens .gns3 générés (sinon
+    deploy_to_gns3.find_gns3_file pourrait en prendre un vieux) et, dans les
+    dossiers de leurs nodes, les i<N>_startup-config.cfg qui ne sont pas le
+    startup-config actuel du node. À appeler une fois le nouveau projet écrit.
+    """
+    removed = []
+    for path in old_projects:
+        if os.path.abspath(path) != os.path.abspath(gns3_path) and os.path.exists(path):
+            os.remove(path)
+            removed.append(path)
+
+    dynamips_dir = os.path.join(project_dir, "project-files", "dynamips")
+    for node_id in old_node_ids:
+        cfg_dir = os.path.join(dynamips_dir, node_id, "configs")
+        if not os.path.isdir(cfg_dir):
+            continue
+        keep = os.path.basename(configs[node_id][0]) if node_id in configs else None
+        for fn in os.listdir(cfg_dir):
+            if _STARTUP_RE.match(fn) and fn != keep:
+                os.remove(os.path.join(cfg_dir, fn))
+                removed.append(os.path.join(cfg_dir, fn))
+    return removed
+
+
+def write_project(project_dir: str, project: dict, configs: Dict[str, Tuple[str, str]]) -> str:
+    os.makedirs(project_dir, exist_ok=True)
+    for node_id, (cfg_path, cfg) in configs.items():
+        dst = os.path.join(project_dir, "project-files", "dynamips", node_id, cfg_path)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        with open(dst, "w", encoding="utf-8") as f:
+            f.write(cfg)
+
+    # Le .gns3 en dernier, et d'un bloc : un projet à moitié écrit n'écrase pas l'ancien
+    gns3_path = os.path.join(project_dir, f"{project['name']}.gns3")
+    tmp_path = gns3_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(project, f, indent=4, sort_keys=True)
+    os.replace(tmp_path, gns3_path)
+    return gns3_path
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description="Génère un projet GNS3 (.gns3 + startup-configs) à partir de l'intent."
+    )
+    ap.add_argument("--intent", default="Intent_file.json", help="Fichier intent (par défaut: Intent_file.json)")
+    ap.add_argument("--output", required=True, help="Dossier du projet GNS3 à créer")
+    ap.add_argument("--name", default=None, help="Nom du projet (par défaut: network_name de l'intent)")
+    ap.add_argument("--image", default=DEFAULT_IMAGE, help=f"Image IOS c7200 (par défaut: {DEFAULT_IMAGE})")
+    ap.add_argument("--console-base", type=int, default=5000, help="Premier port console telnet (par défaut: 5000)")
+    ap.add_argument("--force", action="store_true", help="Écrase un projet déjà présent dans --output")
+    args = ap.parse_args()
+
+    try:
+        t0 = time.monotonic()
+        intent = load_intent(args.intent)
+        name = args.name or intent.get("network_name") or "projetGNS"
+        project_dir = os.path.abspath(args.output)
+
+        generated, others = find_projects(project_dir)
+        if others:
+            # --force n'écrase que ce que ce script a généré, jamais un projet fait à la main
+            raise FileExistsError(
+                f"{project_dir} contient un projet qui n'a pas été généré par ce script : "
+                f"{', '.join(os.path.basename(p) for p in others)}\n"
+                "➡️ Choisis un autre --output (même avec --force, on n'y touche pas)."
+            )
+        if generated and not args.force:
+            raise FileExistsError(
+                f"{project_dir} contient déjà {', '.join(os.path.basename(p) for p in generated)}\n"
+                "➡️ Choisis un autre --output ou ajoute --force."
+            )
+
+        # On réutilise les dynamips_id du projet existant : les i<N>_startup-config.cfg ne bougent pas
+        known_ids = existing_dynamips_ids(generated)
+        project, configs = build_project(intent, name, args.image, args.console_base, known_ids=known_ids)
+        gns3_path = write_project(project_dir, project, configs)
+        for path in prune_project(project_dir, gns3_path, generated, list(known_ids), configs):
+            print(f"🗑️ Removed: {path}")
+    except Exception as e:
+        print("❌ ERREUR:", str(e))
+        return 1
+
+    topo = project["topology"]
+    print(f"✅ {gns3_path}")
+    print(f"- Nodes:  {len(topo['nodes'])}")
+    print(f"- Links:  {len(topo['links'])}")
+    print(f"- Configs: {len(configs)} -> {os.path.join(project_dir, 'project-files', 'dynamips')}")
+    print(f"⏱️ {time.monotonic() - t0:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,4 +1,5 @@
 import ipaddress
+import intent_model
 
 # =========================================================
 # OUTILS
@@ -268,14 +269,15 @@ route-map RM-OUT-TO-{target} deny 20
 # CONFIGURER BGP
 # =========================================================
 
-def configurer_bgp(as_data, asn, router_id, ibgp_neighbors, ebgp_neighbors, intent):
+def configurer_bgp(as_data, asn, router_id, ibgp_neighbors, ebgp_neighbors, intent, policies=None):
     """
     Configuration complète de BGP avec gestion des route-maps et des politiques de propagation.
+    policies : bloc configurer_bgp_policies(intent) déjà calculé (identique pour tous les routeurs).
     """
     if not ibgp_neighbors and not ebgp_neighbors:
         return ""
 
-    cfg = configurer_bgp_policies(intent)
+    cfg = policies if policies is not None else configurer_bgp_policies(intent)
 
     cfg += f"""router bgp {asn}
  bgp router-id {router_id}
@@ -395,8 +397,13 @@ def collect_ebgp_neighbors(router_name: str, intent: dict):
 # ASSEMBLER CONFIGURATION COMPLETE
 # =========================================================
 
-def assembler_configuration(router_name, intent):
-    validate_intent_minimal(intent)
+def assembler_configuration(router_name, intent, policies=None, validate=True):
+    """
+    policies / validate=False : permettent à l'appelant (ex: watch.py) de calculer
+    une seule fois le bloc de policies BGP et la validation pour tous les routeurs.
+    """
+    if validate:
+        validate_intent_minimal(intent)
 
     as_data = get_router_as(router_name, intent)
     if as_data is None:
@@ -424,5 +431,124 @@ def assembler_configuration(router_name, intent):
     protocol_igp = as_data["igp"]["protocol"].upper()
     cfg += configurer_interfaces(interfaces, protocol_igp)
     cfg += configurer_igp(as_data, interfaces, loopback_ip)
-    cfg += configurer_bgp(as_data, as_data["asn"], loopback_ip, ibgp_neighbors, ebgp_neighbors, intent)
-    return cfg
\ No newline at end of file
+    cfg += configurer_bgp(as_data, as_data["asn"], loopback_ip, ibgp_neighbors, ebgp_neighbors, intent, policies)
+    return cfg
+
+# =========================================================
+# VERSION MODÈLE COMPACT (intent_model.IntentModel)
+# Mêmes configs que ci-dessus, mais les adresses sont des entiers
+# et ne sont formatées qu'ici, au moment d'écrire la config.
+# =========================================================
+
+def classful_major_network_int(ip: int) -> str:
+    """Comme classful_major_network, sur une IP entière."""
+    first = ip >> 24
+    if 1 <= first <= 126:
+        return f"{first}.0.0.0"
+    elif 128 <= first <= 191:
+        return f"{first}.{(ip >> 16) & 0xff}.0.0"
+    elif 192 <= first <= 223:
+        return f"{first}.{(ip >> 16) & 0xff}.{(ip >> 8) & 0xff}.0"
+    return f"{first}.0.0.0"
+
+def configurer_interfaces_model(interfaces, protocol_igp: str):
+    cfg = ""
+    for iface in interfaces:
+        mask = intent_model.int_to_ip(intent_model.prefixlen_to_mask(iface.prefixlen))
+        cfg += f"""interface {iface.name}
+ ip address {intent_model.int_to_ip(iface.ip)} {mask}
+"""
+        if protocol_igp == "OSPF" and iface.ospf_metric is not None:
+            cfg += f" ip ospf cost {iface.ospf_metric}\n"
+
+        cfg += """ no shutdown
+!
+"""
+    return cfg
+
+def configurer_igp_model(as_obj, interfaces, loopback_ip):
+    if as_obj.igp == "RIP":
+        cfg = """router rip
+ version 2
+ no auto-summary
+"""
+        for net in sorted({classful_major_network_int(iface.ip) for iface in interfaces}):
+            cfg += f" network {net}\n"
+
+        cfg += " redistribute connected\n"
+        return cfg + "!\n"
+
+    if as_obj.igp == "OSPF":
+        cfg = f"""router ospf {as_obj.process_id}
+ router-id {loopback_ip}
+"""
+        for iface in interfaces:
+            net = iface.ip & intent_model.prefixlen_to_mask(iface.prefixlen)
+            wildcard = wildcard_from_prefixlen(iface.prefixlen)
+            cfg += f" network {intent_model.int_to_ip(net)} {wildcard} area {as_obj.area}\n"
+        cfg += f" network {loopback_ip} 0.0.0.0 area {as_obj.area}\n"
+        return cfg + "!\n"
+
+    return ""
+
+def collect_ebgp_neighbors_model(model, router_name: str):
+    neighbors = []
+    peers = model.router_peers.get(router_name, [])
+    declared = {(p.local_router, p.remote_router) for p in peers}
+
+    for p in peers:
+        lr = p.local_router
+        rr = p.remote_router
+
+        if lr == router_name:
+            remote_ip = model.find_link_peer_ip(lr, rr)
+            if remote_ip is None:
+                raise ValueError(f"Impossible de trouver le lien {lr}<->{rr} dans 'links'.")
+            neighbors.append({
+                "ip": intent_model.int_to_ip(remote_ip),
+                "remote_as": p.remote_as,
+                "relationship": p.relationship
+            })
+
+        if rr == router_name and (rr, lr) not in declared:
+            remote_ip = model.find_link_peer_ip(rr, lr)
+            if remote_ip is None:
+                raise ValueError(f"Impossible de trouver le lien {rr}<->{lr} dans 'links'.")
+            remote = model.routers.get(lr)
+            if remote is None:
+                raise ValueError(f"Impossible de déduire l'ASN de {lr} (routeur introuvable).")
+            neighbors.append({
+                "ip": intent_model.int_to_ip(remote_ip),
+                "remote_as": remote.autonomous_system.asn,
+                "relationship": infer_reverse_relationship(p.relationship)
+            })
+
+    return neighbors
+
+def assembler_configuration_model(model, router_name, policies=None):
+    """
+    Équivalent de assembler_configuration sur le modèle compact
+    (la validation est déjà faite par intent_model.build_model).
+    """
+    router = model.routers.get(router_name)
+    if router is None:
+        raise ValueError(f"Routeur {router_name} introuvable dans autonomous_systems.")
+
+    as_obj = router.autonomous_system
+    loopback_ip = intent_model.int_to_ip(router.loopback)
+    interfaces = model.router_interfaces(router)
+
+    ibgp_neighbors = []
+    if as_obj.ibgp_full_mesh:
+        ibgp_neighbors = [intent_model.int_to_ip(r.loopback) for r in as_obj.routers if r.name != router_name]
+
+    ebgp_neighbors = collect_ebgp_neighbors_model(model, router_name)
+
+    cfg = ""
+    cfg += creer_entete(router_name)
+    cfg += configurer_loopback(loopback_ip)
+    cfg += configurer_interfaces_model(interfaces, as_obj.igp)
+    cfg += configurer_igp_model(as_obj, interfaces, loopback_ip)
+    cfg += configurer_bgp({"advertise_loopback": as_obj.advertise_loopback}, as_obj.asn, loopback_ip,
+                          ibgp_neighbors, ebgp_neighbors, {"bgp": model.bgp}, policies)
+    return cfg
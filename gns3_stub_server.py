@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Mini serveur GNS3 (API v2) en mémoire, pour tester deploy_gns3_api.py / watch.py
+sans GNS3.
+
+Endpoints implémentés (ceux qu'utilise deploy_gns3_api.py) :
+  GET  /v2/projects
+  POST /v2/projects/<project_id>/open
+  GET  /v2/projects/<project_id>/nodes
+  GET  /v2/projects/<project_id>/nodes/<node_id>/files/<path>
+  POST /v2/projects/<project_id>/nodes/<node_id>/files/<path>
+  POST /v2/projects/<project_id>/nodes/<node_id>/{stop,start,reload}
+
+Comme dynamips, un node arrêté réécrit son startup-config avec la config qui
+tournait (celle lue au start) : un upload fait avant le stop est donc perdu.
+
+Utilisation :
+  python3 gns3_stub_server.py --port 3080          # serveur avec les nodes de Intent_file.json
+  python3 gns3_stub_server.py --check              # vérifie deploy_gns3_api.py contre le stub
+"""
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote
+
+import deploy_gns3_api
+
+PROJECT_ID = "00000000-0000-4000-8000-000000000001"
+PROJECT_NAME = "projetGNS"
+
+
+class StubState:
+    """Projet, nodes et fichiers du faux serveur."""
+
+    def __init__(self, names: List[str], started: Tuple[str, ...] = ()):
+        self.lock = threading.Lock()
+        self.project = {"name": PROJECT_NAME, "project_id": PROJECT_ID, "status": "closed"}
+        self.nodes: Dict[str, dict] = {}
+        for i, name in enumerate(names, start=1):
+            node_id = f"00000000-0000-4000-8000-{i:012d}"
+            self.nodes[node_id] = {
+                "name": name,
+                "node_id": node_id,
+                "node_type": "dynamips",
+                "status": "started" if name in started else "stopped",
+                "properties": {"dynamips_id": i},
+            }
+        self.files: Dict[Tuple[str, str], bytes] = {}
+        self.running: Dict[str, bytes] = {}          # node_id -> config chargée au start
+        self.actions: List[Tuple[str, str]] = []     # (nom du node, action)
+        self.uploads: List[Tuple[str, str]] = []     # (nom du node, chemin)
+        self.broken: Set[str] = set()                # nodes dont les uploads renvoient HTTP 500
+        self.connections = set()
+
+    def node_by_name(self, name: str) -> dict:
+        return next(n for n in self.nodes.values() if n["name"] == name)
+
+    def startup(self, node_id: str) -> Tuple[str, str]:
+        return node_id, deploy_gns3_api.startup_config_path(self.nodes[node_id])
+
+    def start(self, node_id: str) -> None:
+        self.nodes[node_id]["status"] = "started"
+        self.running[node_id] = self.files.get(self.startup(node_id), b"")
+
+    def stop(self, node_id: str) -> None:
+        if self.nodes[node_id]["status"] == "started":
+            # dynamips : la NVRAM est resauvegardée dans configs/i<N>_startup-config.cfg
+            self.files[self.startup(node_id)] = self.running.pop(node_id, b"")
+        self.nodes[node_id]["status"] = "stopped"
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, code: int, body: bytes = b"", ctype: str = "application/json") -> None:
+            self.send_response(code)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, code: int, payload) -> None:
+            self._send(code, json.dumps(payload).encode("utf-8"))
+
+        def _route(self) -> Tuple[List[str], Optional[str]]:
+            """(/v2/projects/<pid>/nodes/<nid>/...) -> (segments, chemin de fichier éventuel)"""
+            path = self.path.split("?", 1)[0]
+            file_path = None
+            if "/files/" in path:
+                path, file_path = path.split("/files/", 1)
+                file_path = unquote(file_path)
+            return [p for p in path.split("/") if p], file_path
+
+        def _node(self, parts: List[str]) -> Optional[str]:
+            if len(parts) >= 5 and parts[:2] == ["v2", "projects"] and parts[2] == PROJECT_ID \
+                    and parts[3] == "nodes" and parts[4] in state.nodes:
+                return parts[4]
+            return None
+
+        def do_GET(self):
+            state.connections.add(self.client_address)
+            parts, file_path = self._route()
+            with state.lock:
+                if parts == ["v2", "projects"]:
+                    return self._json(200, [state.project])
+                if parts == ["v2", "projects", PROJECT_ID, "nodes"]:
+                    return self._json(200, list(state.nodes.values()))
+                node_id = self._node(parts)
+                if node_id and file_path is not None:
+                    data = state.files.get((node_id, file_path))
+                    if data is None:
+                        return self._json(404, {"message": f"{file_path} introuvable"})
+                    return self._send(200, data, "application/octet-stream")
+            self._json(404, {"message": "endpoint inconnu"})
+
+        def do_POST(self):
+            state.connections.add(self.client_address)
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            parts, file_path = self._route()
+            with state.lock:
+                if parts == ["v2", "projects", PROJECT_ID, "open"]:
+                    state.project["status"] = "opened"
+                    return self._json(201, state.project)
+                node_id = self._node(parts)
+                if node_id and file_path is not None:
+                    if state.nodes[node_id]["name"] in state.broken:
+                        return self._json(500, {"message": "erreur simulée"})
+                    state.files[(node_id, file_path)] = body
+                    state.uploads.append((state.nodes[node_id]["name"], file_path))
+                    return self._send(201)
+                if node_id and len(parts) == 6 and parts[5] in ("stop", "start", "reload"):
+                    action = parts[5]
+                    if action in ("stop", "reload"):
+                        state.stop(node_id)
+                    if action in ("start", "reload"):
+                        state.start(node_id)
+                    state.actions.append((state.nodes[node_id]["name"], action))
+                    return self._json(200, state.nodes[node_id])
+            self._json(404, {"message": "endpoint inconnu"})
+
+    return Handler
+
+
+def serve(state: StubState, port: int = 0) -> ThreadingHTTPServer:
+    """Démarre le stub dans un thread ; l'URL est http://127.0.0.1:<server.server_port>."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def intent_router_names(path: str) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        intent = json.load(f)
+    return [r["name"] for a in intent.get("autonomous_systems", []) for r in a.get("routers", [])]
+
+
+# =========================================================
+# VÉRIFICATION
+# =========================================================
+
+def check() -> int:
+    """Upload et reload ne touchent qu'aux nodes modifiés, sans perte de config au stop."""
+    names = ["R1", "R2", "R3"]
+    state = StubState(names + ["X9"], started=("R1", "R2"))
+    server = serve(state)
+    client = deploy_gns3_api.GNS3Client(f"http://127.0.0.1:{server.server_port}", pool_size=4)
+    configs = {n: f"hostname {n}\n!\n" for n in names}
+    failures = []
+
+    def expect(cond: bool, msg: str) -> None:
+        print(("✅ " if cond else "❌ ") + msg)
+        if not cond:
+            failures.append(msg)
+
+    def deploy(**kw) -> dict:
+        nodes = client.list_nodes(PROJECT_ID)
+        return deploy_gns3_api.deploy_configs(client, PROJECT_ID, nodes, configs, jobs=4, **kw)
+
+    try:
+        r = deploy(action="reload")
+        expect(sorted(r["changed"]) == names, "1er déploiement : toutes les configs envoyées")
+        expect(r["missing_generated"] == ["X9"], "node sans config générée signalé")
+        expect(sorted(state.actions) == [("R1", "start"), ("R1", "stop"), ("R2", "start"), ("R2", "stop")],
+               "reload uniquement sur les nodes démarrés (stop -> upload -> start)")
+        expect(all(state.files[state.startup(state.node_by_name(n)["node_id"])] == configs[n].encode()
+                   for n in names), "configs présentes après reload (pas écrasées par le stop)")
+
+        state.actions.clear()
+        state.uploads.clear()
+        r = deploy(action="reload")
+        expect(r["changed"] == [] and state.uploads == [] and state.actions == [],
+               "2e déploiement identique : aucun upload, aucun reload")
+
+        configs["R2"] = "hostname R2\n interface Loopback0\n!\n"
+        r = deploy(action="reload", do_backup=True)
+        expect(r["changed"] == ["R2"], "seul R2 est renvoyé après modification")
+        expect(state.actions == [("R2", "stop"), ("R2", "start")], "seul R2 est rechargé")
+        expect(any(p.startswith("configs/i2_startup-config.cfg.bak-") for _, p in state.uploads),
+               "backup du startup-config de R2")
+
+        state.uploads.clear()
+        r = deploy(force=True, do_backup=True, action="reload")
+        expect(sum(1 for _, p in state.uploads if ".bak-" in p) == len(names), "--force --backup fait bien les backups")
+        r = deploy(force=True, do_backup=True, action="reload")
+        baks = [p for n, p in state.uploads if n == "R2" and ".bak-" in p]
+        expect(len(baks) == 2 and len(set(baks)) == 2, "deux backups dans la même seconde ne s'écrasent pas")
+
+        state.actions.clear()
+        state.uploads.clear()
+        configs["R1"] = "hostname R1\n interface Loopback0\n!\n"
+        r = deploy()
+        expect(r["running"] == ["R1"] and state.uploads == [] and state.actions == [],
+               "--action none : node démarré laissé tel quel (pas d'upload perdu au stop)")
+
+        state.broken.add("R1")
+        configs["R3"] = "hostname R3\n interface Loopback0\n!\n"
+        r = deploy(action="reload")
+        expect(r["failed"] == ["R1"] and r["changed"] == ["R3"],
+               "une erreur HTTP sur un node n'empêche pas le rapport des autres")
+        expect(state.node_by_name("R1")["status"] == "started", "node redémarré malgré l'échec de l'upload")
+        state.broken.clear()
+
+        expect(len(state.connections) <= 4, f"connexions keep-alive réutilisées ({len(state.connections)} sockets)")
+    finally:
+        client.close()
+        server.shutdown()
+
+    print(f"\n{'❌ ' + str(len(failures)) + ' échec(s)' if failures else '✅ OK'}")
+    return 1 if failures else 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Faux serveur GNS3 (API v2) pour tester deploy_gns3_api.py.")
+    ap.add_argument("--port", type=int, default=3080, help="Port d'écoute (par défaut: 3080)")
+    ap.add_argument("--intent", default="Intent_file.json", help="Un node par routeur de cet intent")
+    ap.add_argument("--started", action="store_true", help="Démarre tous les nodes au lancement")
+    ap.add_argument("--check", action="store_true", help="Lance la vérification puis quitte")
+    args = ap.parse_args()
+
+    if args.check:
+        return check()
+
+    names = intent_router_names(args.intent)
+    state = StubState(names, started=tuple(names) if args.started else ())
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(state))
+    print(f"🧪 Stub GNS3 sur http://127.0.0.1:{args.port} (projet {PROJECT_NAME}, {len(names)} nodes)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stop.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,306 @@
+"""
+Modèle interne compact de l'intent.
+
+Le JSON est gardé sous forme de dicts/listes et les adresses sous forme de
+chaînes, reparsées à chaque routeur. Pour de gros intents (100k liens) c'est
+la mémoire et ce parsing qui dominent. Ici :
+  - les noms (routeurs, interfaces) sont internés (sys.intern) ;
+  - les adresses et longueurs de préfixe sont des entiers ;
+  - les extrémités de liens sont stockées en colonnes (array) et indexées par
+    routeur (CSR), les objets Link / Interface ne sont créés qu'à la demande ;
+  - les classes utilisent __slots__.
+Les adresses ne sont remises en texte qu'au moment d'écrire la config.
+"""
+import sys
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+NO_METRIC = -1
+
+
+# =========================================================
+# ADRESSES
+# =========================================================
+
+def ip_to_int(ip: str) -> int:
+    """'10.0.0.1' -> 167772161. Lève ValueError si ce n'est pas une IPv4 valide."""
+    parts = ip.split(".")
+    if len(parts) != 4 or not all(p.isdigit() and int(p) <= 255 for p in parts):
+        raise ValueError(f"adresse IPv4 invalide: {ip!r}")
+    a, b, c, d = (int(p) for p in parts)
+    return (a << 24) | (b << 16) | (c << 8) | d
+
+
+def int_to_ip(value: int) -> str:
+    """167772161 -> '10.0.0.1'"""
+    return f"{(value >> 24) & 0xff}.{(value >> 16) & 0xff}.{(value >> 8) & 0xff}.{value & 0xff}"
+
+
+def parse_prefix(text: str) -> Tuple[int, int]:
+    """'10.0.0.1/30' -> (ip entière, 30). Sans /XX on considère /32."""
+    ip, sep, plen = text.partition("/")
+    if not sep:
+        return ip_to_int(ip), 32
+    if not plen.isdigit() or int(plen) > 32:
+        raise ValueError(f"longueur de préfixe invalide: {text!r}")
+    return ip_to_int(ip), int(plen)
+
+
+def prefixlen_to_mask(prefixlen: int) -> int:
+    """30 -> 0xfffffffc"""
+    return (0xffffffff << (32 - prefixlen)) & 0xffffffff if prefixlen else 0
+
+
+# =========================================================
+# OBJETS
+# =========================================================
+
+class AutonomousSystem:
+    __slots__ = ("name", "asn", "igp", "process_id", "area", "ibgp_full_mesh",
+                 "advertise_loopback", "routers")
+
+    def __init__(self, name: str, asn: int, igp: str, process_id=None, area=None,
+                 ibgp_full_mesh: bool = False, advertise_loopback: bool = False):
+        self.name = sys.intern(name)
+        self.asn = asn
+        self.igp = sys.intern(igp.upper())
+        self.process_id = process_id
+        self.area = area
+        self.ibgp_full_mesh = ibgp_full_mesh
+        self.advertise_loopback = advertise_loopback
+        self.routers: List["Router"] = []
+
+
+class Router:
+    __slots__ = ("index", "name", "loopback", "autonomous_system")
+
+    def __init__(self, index: int, name: str, loopback: int, autonomous_system: AutonomousSystem):
+        self.index = index
+        self.name = name
+        self.loopback = loopback
+        self.autonomous_system = autonomous_system
+
+
+class Interface:
+    """Vue sur une extrémité de lien, côté routeur."""
+    __slots__ = ("name", "ip", "prefixlen", "ospf_metric")
+
+    def __init__(self, name: str, ip: int, prefixlen: int, ospf_metric: Optional[int]):
+        self.name = name
+        self.ip = ip
+        self.prefixlen = prefixlen
+        self.ospf_metric = ospf_metric
+
+
+class Link:
+    """Vue sur un lien du modèle (les données restent dans les colonnes)."""
+    __slots__ = ("model", "index")
+
+    def __init__(self, model: "IntentModel", index: int):
+        self.model = model
+        self.index = index
+
+    @property
+    def ospf_metric(self) -> Optional[int]:
+        m = self.model.link_metric[self.index]
+        return None if m == NO_METRIC else m
+
+    @property
+    def endpoints(self) -> List[Tuple[str, Interface]]:
+        m = self.model
+        start, end = m.link_ep_offsets[self.index], m.link_ep_offsets[self.index + 1]
+        return [(m.devices[m.ep_device[e]], m.interface(e)) for e in range(start, end)]
+
+
+class EbgpPeer:
+    __slots__ = ("local_router", "remote_router", "remote_as", "relationship")
+
+    def __init__(self, local_router: str, remote_router: str, remote_as: int, relationship: str):
+        self.local_router = local_router
+        self.remote_router = remote_router
+        self.remote_as = remote_as
+        self.relationship = sys.intern(relationship.lower())
+
+
+# =========================================================
+# MODÈLE
+# =========================================================
+
+class IntentModel:
+    """
+    Intent complet. Les extrémités de liens sont des colonnes parallèles
+    (une case par extrémité, dans l'ordre de intent['links']).
+    """
+    __slots__ = ("network_name", "autonomous_systems", "routers", "devices", "device_index",
+                 "iface_names", "ep_device", "ep_iface", "ep_ip", "ep_prefixlen", "ep_link",
+                 "link_ep_offsets", "link_metric", "router_ep_offsets", "router_ep",
+                 "ebgp_peers", "router_peers", "bgp")
+
+    def __init__(self):
+        self.network_name = ""
+        self.autonomous_systems: List[AutonomousSystem] = []
+        self.routers: Dict[str, Router] = {}
+        self.devices: List[str] = []            # routeurs déclarés puis devices inconnus
+        self.device_index: Dict[str, int] = {}
+        self.iface_names: List[str] = []
+        self.ep_device = array("I")
+        self.ep_iface = array("I")
+        self.ep_ip = array("I")
+        self.ep_prefixlen = array("B")
+        self.ep_link = array("I")
+        self.link_ep_offsets = array("I", [0])
+        self.link_metric = array("i")
+        self.router_ep_offsets = array("I")
+        self.router_ep = array("I")
+        self.ebgp_peers: List[EbgpPeer] = []
+        self.router_peers: Dict[str, List[EbgpPeer]] = {}   # sessions où le routeur est local ou remote
+        self.bgp: dict = {}
+
+    # ----- accès -----
+
+    @property
+    def link_count(self) -> int:
+        return len(self.link_metric)
+
+    def link(self, index: int) -> Link:
+        return Link(self, index)
+
+    def interface(self, ep: int) -> Interface:
+        metric = self.link_metric[self.ep_link[ep]]
+        return Interface(self.iface_names[self.ep_iface[ep]], self.ep_ip[ep], self.ep_prefixlen[ep],
+                         None if metric == NO_METRIC else metric)
+
+    def router_interfaces(self, router: Router) -> List[Interface]:
+        """Même ordre que generateurchat.get_router_interfaces (ordre des liens)."""
+        start, end = self.router_ep_offsets[router.index], self.router_ep_offsets[router.index + 1]
+        return [self.interface(self.router_ep[i]) for i in range(start, end)]
+
+    def find_link_peer_ip(self, local_router: str, remote_router: str) -> Optional[int]:
+        """IP de remote_router sur le premier lien local_router <-> remote_router."""
+        a = self.device_index.get(local_router)
+        b = self.device_index.get(remote_router)
+        if a is None or b is None:
+            return None
+        # On parcourt les liens d'un des deux routeurs (index CSR, dans l'ordre des liens)
+        n_routers = len(self.routers)
+        side = a if a < n_routers else b
+        if side < n_routers:
+            start, end = self.router_ep_offsets[side], self.router_ep_offsets[side + 1]
+            links = (self.ep_link[self.router_ep[i]] for i in range(start, end))
+        else:
+            links = range(self.link_count)
+        for link in links:
+            eps = range(self.link_ep_offsets[link], self.link_ep_offsets[link + 1])
+            if any(self.ep_device[e] == a for e in eps):
+                for e in eps:
+                    if self.ep_device[e] == b:
+                        return self.ep_ip[e]
+        return None
+
+
+def _device(model: IntentModel, name: str) -> int:
+    idx = model.device_index.get(name)
+    if idx is None:
+        idx = len(model.devices)
+        name = sys.intern(name)
+        model.devices.append(name)
+        model.device_index[name] = idx
+    return idx
+
+
+def build_model(intent: dict) -> IntentModel:
+    """
+    Construit le modèle compact à partir de l'intent JSON, et fait au passage
+    les vérifications de generateurchat.validate_intent_minimal.
+    """
+    m = IntentModel()
+    m.network_name = intent.get("network_name", "")
+
+    for a in intent.get("autonomous_systems", []):
+        igp = a.get("igp", {})
+        as_obj = AutonomousSystem(
+            a["name"], a["asn"], igp.get("protocol", ""),
+            process_id=igp.get("process_id"), area=igp.get("area"),
+            ibgp_full_mesh=a.get("ibgp", {}).get("type") == "full-mesh",
+            advertise_loopback=bool(a.get("advertise_loopback")),
+        )
+        m.autonomous_systems.append(as_obj)
+        for r in a.get("routers", []):
+            name = sys.intern(r["name"])
+            if name in m.routers:
+                # Comme get_router_as / get_router_loopback : la première déclaration gagne
+                continue
+            try:
+                loopback = parse_prefix(r["loopback"])[0]
+            except ValueError as e:
+                raise ValueError(f"Loopback de {name} ({a['name']}): {e}") from None
+            router = Router(_device(m, name), name, loopback, as_obj)
+            m.routers[name] = router
+            as_obj.routers.append(router)
+
+    iface_index: Dict[str, int] = {}
+    for li, link in enumerate(intent.get("links", [])):
+        metric = link.get("ospf_metric")
+        m.link_metric.append(NO_METRIC if metric is None else int(metric))
+        for ep in link.get("endpoints", []):
+            if ep.get("device") is None:
+                # Comme get_router_interfaces : une extrémité sans device n'appartient à aucun routeur
+                continue
+            dev = _device(m, ep["device"])
+            iname = ep["interface"]
+            ii = iface_index.get(iname)
+            if ii is None:
+                ii = iface_index[iname] = len(m.iface_names)
+                m.iface_names.append(sys.intern(iname))
+            try:
+                ip, plen = parse_prefix(ep["ip"])
+            except ValueError as e:
+                raise ValueError(f"Lien #{li} ({ep.get('device')} {iname}): {e}") from None
+            m.ep_device.append(dev)
+            m.ep_iface.append(ii)
+            m.ep_ip.append(ip)
+            m.ep_prefixlen.append(plen)
+            m.ep_link.append(li)
+        m.link_ep_offsets.append(len(m.ep_device))
+
+    # Index extrémités par routeur déclaré (CSR), en gardant l'ordre des liens
+    n_routers = len(m.routers)
+    counts = [0] * n_routers
+    for dev in m.ep_device:
+        if dev < n_routers:
+            counts[dev] += 1
+    offsets = array("I", [0])
+    for c in counts:
+        offsets.append(offsets[-1] + c)
+    fill = list(offsets[:-1])
+    router_ep = array("I", bytes(4 * offsets[-1]))
+    for e, dev in enumerate(m.ep_device):
+        if dev < n_routers:
+            router_ep[fill[dev]] = e
+            fill[dev] += 1
+    m.router_ep_offsets = offsets
+    m.router_ep = router_ep
+
+    isolated = [name for name, r in m.routers.items() if counts[r.index] == 0]
+    if isolated:
+        raise ValueError(
+            "Topo incomplète: ces routeurs n'ont aucune interface dans 'links' "
+            f"(donc IGP/iBGP impossibles) : {', '.join(isolated)}"
+        )
+
+    bgp = intent.get("bgp", {})
+    m.bgp = {k: v for k, v in bgp.items() if k != "ebgp_peers"}
+    for p in bgp.get("ebgp_peers", []):
+        lr = sys.intern(p["local_router"])
+        rr = sys.intern(p["remote_router"])
+        if m.find_link_peer_ip(lr, rr) is None:
+            raise ValueError(
+                f"Topo incomplète: ebgp_peers {lr}->{rr} mais aucun lien {lr}<->{rr} dans 'links'."
+            )
+        peer = EbgpPeer(lr, rr, p["remote_as"], p["relationship"])
+        m.ebgp_peers.append(peer)
+        m.router_peers.setdefault(lr, []).append(peer)
+        if rr != lr:
+            m.router_peers.setdefault(rr, []).append(peer)
+
+    return m
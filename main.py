@@ -4,6 +4,7 @@ import sys
 from datetime import datetime
 
 import generateurchat as generateur
+import intent_model
 
 
 def load_intent(path: str) -> dict:
@@ -100,12 +101,17 @@ def main() -> int:
         print(f"- eBGP:    {stats['ebgp_count']} declared peers")
         print()
 
+        # Modèle compact (adresses en entiers, liens en colonnes) : le dict JSON n'est plus utile
+        model = intent_model.build_model(intent)
+        policies = generateur.configurer_bgp_policies(intent) if intent.get("bgp") else None
+        intent = None
+
         print("--- Génération des configurations ---")
         generated = 0
-        for as_data in intent.get("autonomous_systems", []):
-            for router in as_data.get("routers", []):
-                name = router["name"]
-                cfg = generateur.assembler_configuration(name, intent)
+        for as_obj in model.autonomous_systems:
+            for router in as_obj.routers:
+                name = router.name
+                cfg = generateur.assembler_configuration_model(model, name, policies)
 
                 out_path = os.path.join(output_dir, f"{name}.cfg")
                 with open(out_path, "w", encoding="utf-8") as f_out:
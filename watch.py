@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""
+Mode watch : régénère et redéploie automatiquement quand l'intent change.
+
+Au lieu de relancer main.py puis deploy_to_gns3.py à chaque modification, ce
+process reste ouvert et garde en mémoire :
+  - l'intent parsé et le bloc de policies BGP (commun à tous les routeurs),
+  - pour chaque routeur, les morceaux d'intent dont sa config dépend,
+  - la correspondance node -> startup-config du projet GNS3.
+
+À chaque changement de Intent_file.json (inotify sous Linux, polling sinon),
+on attend que les écritures se calment (debounce), on ne régénère que les
+routeurs dont les entrées ont changé, et on ne déploie que les fichiers dont
+le contenu a réellement changé.
+"""
+import argparse
+import ctypes
+import ctypes.util
+import hashlib
+import json
+import os
+import select
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, Set
+
+import deploy_gns3_api
+import deploy_to_gns3
+import generateurchat as generateur
+import intent_model
+from main import ensure_output_dir, load_intent, write_validation_guide
+
+RETRY_DELAY = 5.0       # secondes avant de retenter un déploiement qui a échoué
+
+
+# =========================================================
+# SURVEILLANCE DES FICHIERS
+# =========================================================
+
+class PollingWatcher:
+    """Repli portable (macOS, Windows) : compare mtime/taille des fichiers."""
+
+    def __init__(self, paths: List[str], interval: float = 0.1):
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.interval = interval
+        self._stamps = {p: self._stamp(p) for p in self.paths}
+
+    @staticmethod
+    def _stamp(path: str):
+        try:
+            st = os.stat(path)
+            return (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for p in self.paths:
+                s = self._stamp(p)
+                if s != self._stamps[p]:
+                    self._stamps[p] = s
+                    changed.add(p)
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+    def settle(self, delay: float) -> None:
+        """Attend qu'il se soit écoulé delay secondes sans aucune modification."""
+        while self.wait(delay):
+            pass
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """
+    inotify via ctypes (pas de dépendance externe).
+    On surveille les DOSSIERS : beaucoup d'éditeurs sauvegardent en écrivant un
+    fichier temporaire puis en le renommant, ce qui casserait un watch posé sur le fichier.
+    """
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_NONBLOCK = os.O_NONBLOCK
+    IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, paths: List[str]):
+        libc_name = ctypes.util.find_library("c")
+        if not sys.platform.startswith("linux") or libc_name is None:
+            raise OSError("inotify indisponible sur cette plateforme")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify indisponible (libc sans inotify_init1)")
+
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 a échoué")
+
+        self.paths = [os.path.abspath(p) for p in paths]
+        self._wd_to_dir: Dict[int, str] = {}
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        for d in sorted({os.path.dirname(p) for p in self.paths}):
+            wd = libc.inotify_add_watch(self.fd, d.encode(), mask)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch a échoué sur {d}")
+            self._wd_to_dir[wd] = d
+
+    def wait(self, timeout: Optional[float]) -> Set[str]:
+        """Comme PollingWatcher.wait : ne rend la main que sur un fichier surveillé, ou au timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not select.select([self.fd], [], [], remaining)[0]:
+                return set()
+            changed = self._read_events()
+            if changed:
+                return changed
+
+    def settle(self, delay: float) -> None:
+        """
+        Attend qu'il se soit écoulé delay secondes sans AUCUN évènement dans les
+        dossiers surveillés : un fichier de swap/backup de l'éditeur écrit à côté
+        de l'intent compte aussi comme de l'activité.
+        """
+        while select.select([self.fd], [], [], delay)[0]:
+            self._read_events()
+
+    def _read_events(self) -> Set[str]:
+        changed = set()
+        while True:
+            try:
+                buf = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            off = 0
+            while off < len(buf):
+                wd, _, _, length = self._EVENT.unpack_from(buf, off)
+                off += self._EVENT.size
+                name = buf[off:off + length].rstrip(b"\0").decode()
+                off += length
+                full = os.path.join(self._wd_to_dir.get(wd, ""), name)
+                if full in self.paths:
+                    changed.add(full)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def make_watcher(paths: List[str], force_polling: bool):
+    if not force_polling:
+        try:
+            return InotifyWatcher(paths)
+        except OSError as e:
+            print(f"ℹ️ {e} -> polling")
+    return PollingWatcher(paths)
+
+
+# =========================================================
+# RÉGÉNÉRATION INCRÉMENTALE
+# =========================================================
+
+def _digest(*parts) -> bytes:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).digest()
+
+
+def router_inputs(intent: dict) -> Dict[str, bytes]:
+    """
+    Pour chaque routeur, une empreinte (sha256) des parties de l'intent qui
+    influencent sa config : son AS (donc les loopbacks iBGP), ses liens (qui
+    portent aussi l'IP du voisin eBGP), ses sessions eBGP (avec l'ASN du voisin)
+    et les policies BGP. Si cette empreinte ne bouge pas, la config du routeur
+    ne peut pas changer.
+    L'AS et les policies ne sont sérialisés qu'une fois : seul leur digest entre
+    dans l'empreinte de chaque routeur.
+    """
+    bgp = intent.get("bgp", {})
+    policies = _digest({k: v for k, v in bgp.items() if k != "ebgp_peers"}).hex()
+
+    links_by_router: Dict[str, list] = {}
+    for link in intent.get("links", []):
+        for ep in link.get("endpoints", []):
+            links_by_router.setdefault(ep.get("device"), []).append(link)
+
+    peers_by_router: Dict[str, list] = {}
+    for p in bgp.get("ebgp_peers", []):
+        peers_by_router.setdefault(p["local_router"], []).append(p)
+        peers_by_router.setdefault(p["remote_router"], []).append(p)
+
+    asn_by_router = {}
+    for as_data in intent.get("autonomous_systems", []):
+        for r in as_data.get("routers", []):
+            asn_by_router[r["name"]] = as_data.get("asn")
+
+    inputs = {}
+    for as_data in intent.get("autonomous_systems", []):
+        as_digest = _digest(as_data).hex()
+        for r in as_data.get("routers", []):
+            name = r["name"]
+            peers = peers_by_router.get(name, [])
+            remote_asns = sorted(
+                (p["local_router"], str(asn_by_router.get(p["local_router"]))) for p in peers
+            )
+            inputs[name] = _digest(as_digest, policies, links_by_router.get(name, []), peers, remote_asns)
+    return inputs
+
+
+class IntentState:
+    """Intent + configs générées gardés en mémoire entre deux régénérations."""
+
+    def __init__(self, intent_path: str):
+        self.intent_path = intent_path
+        self.intent: dict = {}
+        self.inputs: Dict[str, bytes] = {}
+        self.configs: Dict[str, str] = {}
+        self._pending = None
+
+    def reload(self) -> Dict[str, str]:
+        """
+        Relit l'intent et renvoie {routeur: config} pour les configs qui ont changé.
+        L'état en mémoire n'est mis à jour que par commit(), une fois le déploiement fait.
+        """
+        intent = load_intent(self.intent_path)
+        model = intent_model.build_model(intent)
+        policies = generateur.configurer_bgp_policies(intent) if intent.get("bgp") else None
+
+        inputs = router_inputs(intent)
+        changed = {}
+        for name, fingerprint in inputs.items():
+            if self.inputs.get(name) == fingerprint and name in self.configs:
+                continue
+            cfg = generateur.assembler_configuration_model(model, name, policies)
+            if cfg != self.configs.get(name):
+                changed[name] = cfg
+
+        self._pending = (intent, inputs, changed)
+        return changed
+
+    def commit(self, failed: Set[str]) -> None:
+        """
+        Valide le dernier reload(), sauf pour les routeurs de failed : ils gardent
+        leur ancienne empreinte et seront donc régénérés et redéployés au prochain cycle.
+        """
+        intent, inputs, changed = self._pending
+        self._pending = None
+        self.intent = intent
+        self.inputs = {n: (self.inputs.get(n) if n in failed else f) for n, f in inputs.items()}
+        self.inputs = {n: f for n, f in self.inputs.items() if f is not None}
+        self.configs = {n: c for n, c in self.configs.items() if n in inputs}
+        self.configs.update({n: c for n, c in changed.items() if n not in failed})
+
+
+# =========================================================
+# DÉPLOIEMENT
+# =========================================================
+
+class LocalDeployer:
+    """Copie dans project-files (comme deploy_to_gns3.py), avec la map node -> fichier en cache."""
+
+    def __init__(self, project_dir: str, do_backup: bool):
+        self.project_dir = os.path.abspath(project_dir)
+        self.do_backup = do_backup
+        self.gns3_path = deploy_to_gns3.find_gns3_file(self.project_dir)
+        self.dst_by_name: Dict[str, str] = {}
+        self.missing: Set[str] = set()
+        self.refresh()
+
+    def refresh(self) -> None:
+        self.dst_by_name = {}
+        for n in deploy_to_gns3.load_project_nodes(self.gns3_path):
+            name, node_id = n.get("name"), n.get("node_id")
+            if not name or not node_id:
+                continue
+            node_dir = deploy_to_gns3.find_node_dir(self.project_dir, node_id)
+            dst = deploy_to_gns3.find_startup_config(node_dir) if node_dir else None
+            if dst:
+                self.dst_by_name[name] = dst
+
+    def deploy(self, files: Dict[str, str], first: bool) -> Set[str]:
+        """
+        Renvoie les routeurs à retenter (erreur d'écriture). Un routeur sans node
+        dans le projet n'est pas retenté : on le signale une fois, comme deploy_to_gns3.py.
+        """
+        if any(name not in self.dst_by_name for name in files):
+            self.refresh()
+        failed = set()
+        for name, src in files.items():
+            dst = self.dst_by_name.get(name)
+            if dst is None:
+                if name not in self.missing:
+                    self.missing.add(name)
+                    print(f"⚠️ No startup-config found for: {name}")
+                continue
+            self.missing.discard(name)
+            try:
+                if first and os.path.exists(dst):
+                    with open(src, "r", encoding="utf-8") as a, open(dst, "r", encoding="utf-8") as b:
+                        if a.read() == b.read():
+                            continue
+                deploy_to_gns3.deploy_one(name, src, dst, do_backup=self.do_backup, dry_run=False)
+            except OSError as e:
+                print(f"❌ {name}: {e}")
+                failed.add(name)
+        return failed
+
+
+class ApiDeployer:
+    """Passe par l'API du serveur GNS3 (deploy_gns3_api.py), avec les nodes en cache."""
+
+    def __init__(self, server: str, project: str, do_backup: bool, action: str, jobs: int,
+                 user: Optional[str], password: Optional[str]):
+        self.client = deploy_gns3_api.GNS3Client(server, user, password, pool_size=jobs)
+        self.do_backup = do_backup
+        self.action = action
+        self.jobs = jobs
+        p = self.client.find_project(project)
+        self.project_id = p["project_id"]
+        if p.get("status") != "opened":
+            self.client.open_project(self.project_id)
+        self.nodes = self.client.list_nodes(self.project_id)
+        self.missing: Set[str] = set()
+
+    def deploy(self, files: Dict[str, str], first: bool) -> Set[str]:
+        """
+        Renvoie les routeurs à retenter (erreur HTTP). Un routeur sans node dans
+        le projet n'est pas retenté : on le signale une fois.
+        """
+        configs = {}
+        for name, src in files.items():
+            with open(src, "r", encoding="utf-8") as f:
+                configs[name] = f.read()
+        nodes = [n for n in self.nodes if n.get("name") in configs]
+        # Le status (started/stopped) décide du stop/start : il doit être frais
+        if len(nodes) < len(configs) or self.action != "none":
+            self.nodes = self.client.list_nodes(self.project_id)
+            nodes = [n for n in self.nodes if n.get("name") in configs]
+        # Au premier passage on compare au contenu distant ; ensuite on sait déjà que ça a changé.
+        report = deploy_gns3_api.deploy_configs(self.client, self.project_id, nodes, configs,
+                                                do_backup=self.do_backup, force=not first,
+                                                action=self.action, jobs=self.jobs)
+        missing = set(configs) - {n.get("name") for n in nodes}
+        missing.update(report["missing_startup"])
+        for name in sorted(missing - self.missing):
+            print(f"⚠️ No node / startup-config found for: {name}")
+        self.missing = (self.missing - set(configs)) | missing
+        # Seuls les nodes en erreur sont retentés : les autres sont déjà à jour
+        return set(report["failed"])
+
+
+# =========================================================
+# BOUCLE PRINCIPALE
+# =========================================================
+
+def write_changed(output_dir: str, changed: Dict[str, str]) -> Dict[str, str]:
+    """Écrit output/<routeur>.cfg pour les configs modifiées ; renvoie {routeur: chemin}."""
+    files = {}
+    for name, cfg in sorted(changed.items()):
+        out_path = os.path.join(output_dir, f"{name}.cfg")
+        with open(out_path, "w", encoding="utf-8") as f_out:
+            f_out.write(cfg)
+        files[name] = out_path
+    return files
+
+
+def run_once(state: IntentState, output_dir: str, deployer, first: bool) -> bool:
+    """Un cycle régénération + déploiement. Renvoie False s'il reste des routeurs à redéployer."""
+    t0 = time.monotonic()
+    changed = state.reload()
+    if first:
+        write_validation_guide(output_dir)
+        # Au démarrage, la sortie sur disque peut déjà être à jour : on ne réécrit que ce qui diffère
+        on_disk = {}
+        for name, cfg in changed.items():
+            path = os.path.join(output_dir, f"{name}.cfg")
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    if f.read() == cfg:
+                        on_disk[name] = path
+        files = write_changed(output_dir, {n: c for n, c in changed.items() if n not in on_disk})
+        files.update(on_disk)
+    else:
+        files = write_changed(output_dir, changed)
+
+    for name in sorted(files):
+        print(f"✅ {name} -> {files[name]}")
+    failed: Set[str] = set()
+    if deployer is not None and files:
+        try:
+            failed = deployer.deploy(files, first)
+        except Exception as e:
+            # Serveur GNS3 injoignable, erreur HTTP... : rien n'est considéré comme déployé
+            print("❌ ERREUR de déploiement:", str(e))
+            failed = set(files)
+    state.commit(failed)
+
+    if failed:
+        print(f"⚠️ À redéployer ({len(failed)}) : {', '.join(sorted(failed))} — nouvel essai dans {RETRY_DELAY:.0f}s")
+    print(f"⏱️ {len(files) - len(failed)} routeur(s) à jour en {time.monotonic() - t0:.3f}s")
+    return not failed
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(
+        description="Surveille l'intent, régénère et redéploie les configs des routeurs modifiés."
+    )
+    ap.add_argument("--intent", default="Intent_file.json", help="Fichier intent (par défaut: Intent_file.json)")
+    ap.add_argument("--project", default=None,
+                    help="Dossier projet GNS3 (backend local) ou nom/project_id du projet (avec --server)")
+    ap.add_argument("--server", default=None, help="URL du serveur GNS3 : active le déploiement via l'API REST")
+    ap.add_argument("--user", default=None, help="Utilisateur HTTP basic auth (avec --server)")
+    ap.add_argument("--password", default=None, help="Mot de passe HTTP basic auth (avec --server)")
+    ap.add_argument("--action", choices=["none", "reload", "restart", "start"], default="none",
+                    help="Action sur les nodes modifiés après upload (avec --server)")
+    ap.add_argument("--jobs", type=int, default=8, help="Requêtes HTTP en parallèle (avec --server)")
+    ap.add_argument("--backup", action="store_true", help="Fait un backup du startup-config avant d'écraser")
+    ap.add_argument("--debounce", type=float, default=0.15,
+                    help="Attente (s) sans nouvel évènement avant de régénérer (par défaut: 0.15)")
+    ap.add_argument("--poll", action="store_true", help="Force le polling au lieu d'inotify")
+    args = ap.parse_args()
+
+    intent_path = os.path.abspath(args.intent)
+    try:
+        intent = load_intent(intent_path)
+        output_dir = intent.get("project_settings", {}).get("output_folder", "output")
+        ensure_output_dir(output_dir)
+
+        deployer = None
+        if args.server:
+            if not args.project:
+                raise ValueError("--server demande aussi --project (nom ou project_id).")
+            deployer = ApiDeployer(args.server, args.project, args.backup, args.action, args.jobs,
+                                   args.user, args.password)
+        elif args.project:
+            deployer = LocalDeployer(args.project, args.backup)
+
+        state = IntentState(intent_path)
+        retry = not run_once(state, output_dir, deployer, first=True)
+    except Exception as e:
+        print("❌ ERREUR:", str(e))
+        return 1
+
+    watcher = make_watcher([intent_path], args.poll)
+    print(f"👀 Watching {intent_path} ({type(watcher).__name__}) — Ctrl+C pour quitter")
+    try:
+        while True:
+            # S'il reste des routeurs non déployés, on retente après RETRY_DELAY même sans modification
+            watcher.wait(RETRY_DELAY if retry else None)
+            # Debounce : on laisse l'éditeur finir d'écrire
+            watcher.settle(args.debounce)
+            try:
+                retry = not run_once(state, output_dir, deployer, first=False)
+            except Exception as e:
+                # Intent en cours d'édition (JSON invalide...) : on garde l'état précédent,
+                # y compris les déploiements à retenter, et on attend la prochaine modification
+                print("❌ ERREUR:", str(e))
+    except KeyboardInterrupt:
+        print("\n👋 Stop.")
+    finally:
+        watcher.close()
+        if isinstance(deployer, ApiDeployer):
+            deployer.client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())